@@ -1,20 +1,75 @@
+import functools
+
 import numpy as np
-import pandas as pd
 from acquire_spectra_utils import (
-    get_datafile, 
-    lorentzian_profile,
+    CACHE_MAX_POINTS,
+    load_linelist,
+    make_frequency_grid,
+    lorentzian_sum,
     add_white_noise,
     apply_cavity_mode_response,
     param_check,
 )
 from scipy.signal import find_peaks as fp
 
-def acquire_spectra(params: dict, window=25, resolution=0.001, fwhm=0.007, Q=10000, Pmax=1.0):
+# Constants
+c_SI = 299792458.0    # Speed of light in m/s
+vrms = 1760.0         # Helium velocity in m/s
+
+# Fractional Doppler splitting of every line, shared by all requests.
+SPLIT_RATIO = vrms / c_SI
+
+@functools.lru_cache(maxsize=16)
+def _line_spectrum(
+    molecule: str,
+    crop_min: float,
+    crop_max: float,
+    window: float,
+    resolution: float,
+    fwhm: float,
+    wing_cutoff: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the frequency grid and the noiseless, Doppler-split Lorentzian spectrum of the
+    molecule between crop_min and crop_max. The spectrum only depends on these inputs, so it
+    is cached across requests (for grids of up to CACHE_MAX_POINTS) and returned read-only.
+    """
+    # Look up the (cached) line list.
+    line_freq, line_intensity = load_linelist(molecule)
+
+    # Filter out spectral lines that are outside the cropping bounds. The line list is
+    # sorted by frequency, so the remaining lines form a contiguous slice.
+    if crop_min is not None and crop_max is not None:
+        lo = np.searchsorted(line_freq, crop_min - window, side="left")
+        hi = np.searchsorted(line_freq, crop_max + window, side="right")
+        line_intensity = line_intensity[lo:hi]
+        line_freq = line_freq[lo:hi]
+
+    # Both Doppler-split components of every line, stacked into one set of centers.
+    centers = np.concatenate([line_freq * (1 + SPLIT_RATIO), line_freq * (1 - SPLIT_RATIO)])
+    intensities = np.concatenate([line_intensity, line_intensity])
+
+    # Define the overall frequency grid.
+    final_grid = make_frequency_grid(crop_min, crop_max, resolution)
+
+    # Evaluate all Lorentzian components in one pass directly on the overall grid,
+    # keeping at least a few grid points on either side of each center.
+    half_width = max(wing_cutoff * fwhm / 2, 8 * resolution)
+    final_spectrum = lorentzian_sum(final_grid, centers, intensities, fwhm, half_width)
+
+    final_grid.setflags(write=False)
+    final_spectrum.setflags(write=False)
+    return final_grid, final_spectrum
+
+def acquire_spectra(params: dict, window=25, resolution=0.001, fwhm=0.007, Q=10000, Pmax=1.0, wing_cutoff=100, as_arrays=False):
     """
     For each spectral line in the data file corresponding to the molecule specified in params,
-    create a local frequency grid (spanning ±window around its doubled frequency) and compute its
-    broadened spectrum using a Lorentzian profile. The local spectra are then interpolated onto a 
-    common grid and summed to produce the final spectrum.
+    evaluate its Doppler-split Lorentzian profile directly on a common frequency grid and sum the
+    contributions to produce the final spectrum. Each profile is truncated at wing_cutoff half
+    widths from its center, beyond which its contribution is far below the noise level.
+
+    By default x and y are returned as lists of formatted strings; with as_arrays=True they are
+    returned as the underlying NumPy arrays instead.
     """
     # verify user input is valid
     if not param_check(params):
@@ -29,9 +84,6 @@ def acquire_spectra(params: dict, window=25, resolution=0.001, fwhm=0.007, Q=100
     # Retrieve vres parameter from params.
     v_res = params.get("vres")
     
-    # Use the helper function to obtain the correct data file path.
-    datafile = get_datafile(molecule)
-    
     # Determine cropping bounds based on frequency mode.
     frequencyMode = params.get("acquisitionType", "single")
     if frequencyMode == "single":
@@ -45,45 +97,14 @@ def acquire_spectra(params: dict, window=25, resolution=0.001, fwhm=0.007, Q=100
         crop_min = frequency_min - window
         crop_max = frequency_max + window
     
-    # Read the data file.
-    df = pd.read_csv(datafile, sep=r"\s+", header=None, names=["Frequency", "Intensity"])
-    df["Frequency"] = pd.to_numeric(df["Frequency"], errors='coerce')
-    df["Intensity"] = pd.to_numeric(df["Intensity"], errors='coerce')
-    line_freq = df["Frequency"].values
-    line_intensity = df["Intensity"].values
-
-    # Constants
-    c_SI = 299792458.0    # Speed of light in m/s
-    vrms = 1760.0         # Helium velocity in m/s
-
-    # Filter out spectral lines that are outside the cropping bounds.
-    if crop_min is not None and crop_max is not None:
-        mask_lines = (line_freq + window >= crop_min) & (line_freq - window <= crop_max)
-        line_intensity = line_intensity[mask_lines]
-        line_freq = line_freq[mask_lines]
-
-    # Collect individual spectra (local grid and corresponding spectrum).
-    individual_spectra = []
-    for f, I in zip(line_freq, line_intensity):
-        local_grid = np.arange(f - window, f + window, resolution)
-        split_val = (f / c_SI) * vrms
-        add_split = (f + split_val)
-        subtract_split = (f - split_val)
-
-        profile_main = I * lorentzian_profile(local_grid, add_split, fwhm)
-        profile_split = I * lorentzian_profile(local_grid, subtract_split, fwhm)
-        
-        local_spectrum = profile_main + profile_split
-
-        individual_spectra.append((local_grid, local_spectrum))
-    
-    # Define the overall frequency grid.
-    final_grid = np.arange(crop_min, crop_max, resolution)
-    final_spectrum = np.zeros_like(final_grid, dtype=float)
-    
-    # Interpolate each individual spectrum onto the overall grid and sum them.
-    for local_grid, local_spec in individual_spectra:
-        final_spectrum += np.interp(final_grid, local_grid, local_spec, left=0, right=0)
+    # Look up the noiseless spectrum, bypassing the cache for large grids; noise is added
+    # to a fresh copy per call.
+    if (crop_max - crop_min) / resolution <= CACHE_MAX_POINTS:
+        line_spectrum_fn = _line_spectrum
+    else:
+        line_spectrum_fn = _line_spectrum.__wrapped__
+    final_grid, line_spectrum = line_spectrum_fn(molecule, crop_min, crop_max, window, resolution, fwhm, wing_cutoff)
+    final_spectrum = line_spectrum.copy()
 
     # Add white noise to the final spectrum, depending on the number of cycles per step.
     cyclesPerStep = params.get("numCyclesPerStep")
@@ -93,12 +114,15 @@ def acquire_spectra(params: dict, window=25, resolution=0.001, fwhm=0.007, Q=100
     final_spectrum = apply_cavity_mode_response(params, final_grid, final_spectrum, v_res, Q, Pmax)
 
     # Take absolute value of the final spectrum.
-    final_spectrum = np.abs(final_spectrum)
+    np.abs(final_spectrum, out=final_spectrum)
+
+    if as_arrays:
+        return {"success": True, "x": final_grid, "y": final_spectrum}
 
     return {
         "success": True,
-        "x": [f"{xi:.4f}" for xi in final_grid],
-        "y": [f"{yi:.6f}" for yi in final_spectrum],
+        "x": [f"{xi:.4f}" for xi in final_grid.tolist()],
+        "y": [f"{yi:.6f}" for yi in final_spectrum.tolist()],
     }
 
 def find_peaks(
@@ -111,8 +135,8 @@ def find_peaks(
     Use scipy.signal.find_peaks to locate peaks in y_data above an absolute threshold.
     """
     try:
-        x = np.array(x_data)
-        y = np.array(y_data)
+        x = np.asarray(x_data, dtype=float)
+        y = np.asarray(y_data, dtype=float)
 
         lines, props = fp(
             y,
@@ -122,10 +146,9 @@ def find_peaks(
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-    peaks = {}
-    for line in lines:
-        freq = x[line]
-        intensity = y[line]
-        peaks[f"{float(freq):.4f}"] = f"{float(intensity):.4f}"
+    peaks = {
+        f"{freq:.4f}": f"{intensity:.4f}"
+        for freq, intensity in zip(x[lines].tolist(), y[lines].tolist())
+    }
 
-    return {"success": True, "peaks": peaks}
\ No newline at end of file
+    return {"success": True, "peaks": peaks}
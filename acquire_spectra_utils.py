@@ -1,6 +1,25 @@
+import functools
 import os
 import numpy as np
 
+try:
+    from numba import njit, prange
+except ImportError:
+    # numba is optional; the NumPy implementation below is used without it.
+    njit = None
+
+# Random number generator used for all simulated noise, and the process it was
+# created in. See _rng().
+_RNG = None
+_RNG_PID = None
+
+# Upper bound on the number of elements in a temporary (lines x grid points) array.
+_CHUNK_ELEMENTS = 1 << 20
+
+# Grids with more points than this (200 MHz at the default 1 kHz resolution) are not
+# cached across requests, which bounds the memory each cache can pin per worker.
+CACHE_MAX_POINTS = 200_000
+
 def get_datafile(molecule: str, directory: str = "linelists") -> str:
     """
     Return the full path to the data file corresponding to the given molecule.
@@ -22,6 +41,23 @@ def get_datafile(molecule: str, directory: str = "linelists") -> str:
     filename = molecule_to_file[molecule]
     return os.path.join(directory, filename)
 
+@functools.lru_cache(maxsize=None)
+def load_linelist(molecule: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the line list of the given molecule as two read-only, contiguous arrays of
+    frequencies and intensities, sorted by frequency. Each file is parsed only once
+    per process.
+    """
+    line_freq, line_intensity = np.loadtxt(
+        get_datafile(molecule), usecols=(0, 1), dtype=np.float64, ndmin=2, unpack=True
+    )
+    order = np.argsort(line_freq, kind="stable")
+    line_freq = line_freq[order]
+    line_intensity = line_intensity[order]
+    line_freq.setflags(write=False)
+    line_intensity.setflags(write=False)
+    return line_freq, line_intensity
+
 def param_check(params: dict[str, object]) -> bool:
     """
     Parses user provided parameters for validity.
@@ -54,22 +90,174 @@ def param_check(params: dict[str, object]) -> bool:
 
     return True
 
-def lorentzian_profile(grid, center, fwhm):
-    """Calculate the Lorentzian profile on a given grid centered at 'center'."""
+def make_frequency_grid(start: float, stop: float, resolution: float) -> np.ndarray:
+    """
+    Return the uniform grid start, start + resolution, ... up to (but excluding) stop.
+    The number of points is computed once from the span, and the small tolerance keeps
+    a span that is a whole number of steps (up to rounding error) from gaining an extra
+    point at stop. Unlike np.arange with a float step, the points themselves do not drift.
+    """
+    num_points = max(0, int(np.ceil((stop - start) / resolution - 1e-9)))
+    return start + resolution * np.arange(num_points)
+
+def _lorentzian_sum_kernel(grid, centers, intensities, scale, hwhm_sq, half_width, out):
+    """
+    Compiled counterpart of lorentzian_sum. The grid is split into blocks that are filled
+    in parallel; within a block each grid point sums the lines whose centers (which must
+    be sorted) lie within ±half_width of it, tracked with two pointers that only move
+    forward. No two threads ever write to the same element of out. The profile constants
+    are passed in precomputed: scale = hwhm / pi and hwhm_sq = hwhm ** 2.
+    """
+    block = 4096
+    for b in prange((grid.size + block - 1) // block):
+        start = b * block
+        stop = min(start + block, grid.size)
+        lo = np.searchsorted(centers, grid[start] - half_width)
+        hi = lo
+        for i in range(start, stop):
+            while lo < centers.size and centers[lo] < grid[i] - half_width:
+                lo += 1
+            while hi < centers.size and centers[hi] < grid[i] + half_width:
+                hi += 1
+            acc = 0.0
+            for j in range(lo, hi):
+                d = grid[i] - centers[j]
+                acc += intensities[j] / (d * d + hwhm_sq)
+            out[i] += scale * acc
+
+if njit is not None:
+    _lorentzian_sum_kernel = njit(parallel=True, fastmath=True, cache=True)(_lorentzian_sum_kernel)
+
+def lorentzian_sum(
+    grid: np.ndarray,
+    centers: np.ndarray,
+    intensities: np.ndarray,
+    fwhm: float,
+    half_width: float,
+) -> np.ndarray:
+    """
+    Sum the Lorentzian profiles of all lines directly on a sorted grid. Each line only
+    contributes to the grid points within ±half_width of its center. When numba is
+    available the sum runs in a compiled parallel kernel; otherwise lines are processed
+    in chunks so the temporary (lines x points) array stays bounded in size.
+
+    The spectrum is returned as float32; the grid and the per-point sums stay in float64,
+    since float32 cannot resolve kHz offsets at GHz frequencies.
+    """
+    spectrum = np.zeros_like(grid, dtype=np.float32)
+    if centers.size == 0:
+        return spectrum
+
     hwhm = fwhm / 2
-    return (1 / np.pi) * (hwhm / ((grid - center)**2 + hwhm**2))
+    scale = hwhm / np.pi
+    hwhm_sq = hwhm * hwhm
+
+    if njit is not None:
+        order = np.argsort(centers)
+        _lorentzian_sum_kernel(grid, centers[order], intensities[order], scale, hwhm_sq, half_width, spectrum)
+        return spectrum
+
+    lo = np.searchsorted(grid, centers - half_width)
+    hi = np.searchsorted(grid, centers + half_width)
+    width = int((hi - lo).max())
+    if width == 0:
+        return spectrum
+    offsets = np.arange(width)
+
+    chunk = max(1, _CHUNK_ELEMENTS // width)
+    for start in range(0, centers.size, chunk):
+        stop = start + chunk
+        idx = lo[start:stop, None] + offsets
+        outside = idx >= hi[start:stop, None]
+        np.minimum(idx, grid.size - 1, out=idx)
+
+        # Evaluate the weighted profiles in the gathered grid buffer itself.
+        profile = grid[idx]
+        profile -= centers[start:stop, None]
+        profile *= profile
+        profile += hwhm_sq
+        np.divide(scale * intensities[start:stop, None], profile, out=profile)
+        profile[outside] = 0
+
+        spectrum += np.bincount(idx.ravel(), weights=profile.ravel(), minlength=grid.size)
+
+    return spectrum
+
+def _rng() -> np.random.Generator:
+    """
+    Return this process's noise generator, creating a freshly seeded one on first use
+    and after a fork, so preforked server workers never share a random stream.
+    """
+    global _RNG, _RNG_PID
+    if _RNG_PID != os.getpid():
+        _RNG = np.random.default_rng()
+        _RNG_PID = os.getpid()
+    return _RNG
 
 def add_white_noise(spectrum: np.ndarray, num_cycles_per_step: float, is_cavity_mode: bool) -> np.ndarray:
     """
-    Adds white noise to the input spectrum.
+    Adds white noise to the input spectrum in place and returns it.
     """
     if is_cavity_mode:
         noise_level = 0.01 / np.sqrt(num_cycles_per_step)
     else:
         noise_level = 0.05 / np.sqrt(num_cycles_per_step)
 
-    noise = np.random.normal(0, noise_level, spectrum.shape)
-    return spectrum + noise
+    noise = _rng().standard_normal(spectrum.shape, dtype=spectrum.dtype)
+    noise *= noise_level
+    spectrum += noise
+    return spectrum
+
+@functools.lru_cache(maxsize=16)
+def _cavity_response(
+    frequencyMode: str,
+    v_res: float,
+    frequency_min: float,
+    frequency_max: float,
+    stepSize: float,
+    grid_start: float,
+    grid_stop: float,
+    grid_size: int,
+    Q: float,
+    Pmax: float,
+) -> np.ndarray:
+    """
+    Return the noiseless float32 cavity mode response on the uniform grid described by
+    grid_start, grid_stop and grid_size. Responses are cached across requests and
+    returned read-only.
+    """
+    frequency_grid = np.linspace(grid_start, grid_stop, grid_size)
+
+    if frequencyMode == "single":
+        # Single cavity mode centered at v_res.
+        # Evaluated in a single buffer to avoid grid-sized temporaries.
+        half_gamma_sq = (v_res / Q / 2) ** 2
+        cavity_response = frequency_grid - v_res
+        cavity_response *= cavity_response
+        cavity_response += half_gamma_sq
+        np.divide(Pmax * half_gamma_sq, cavity_response, out=cavity_response)
+
+    elif frequencyMode == "range":
+        # Create a list of cavity mode centers, separated by stepSize, and sum their
+        # responses one center at a time in a reused scratch buffer.
+        centers = np.arange(frequency_min, frequency_max + stepSize, stepSize)
+        half_gamma_sq = (centers / Q / 2) ** 2
+        cavity_response = np.zeros_like(frequency_grid)
+        scratch = np.empty_like(frequency_grid)
+        for center, g2 in zip(centers.tolist(), half_gamma_sq.tolist()):
+            np.subtract(frequency_grid, center, out=scratch)
+            scratch *= scratch
+            scratch += g2
+            np.divide(Pmax * g2, scratch, out=scratch)
+            cavity_response += scratch
+
+    else:
+        raise ValueError(f"Unknown acquisition type '{frequencyMode}'.")
+
+    # Stored as float32 to match the spectrum it multiplies.
+    cavity_response = cavity_response.astype(np.float32)
+    cavity_response.setflags(write=False)
+    return cavity_response
 
 def apply_cavity_mode_response(
     params: dict[str, object],
@@ -80,34 +268,48 @@ def apply_cavity_mode_response(
     Pmax: float = 1.0
 ) -> np.ndarray:
     """
-    Multiply the spectrum by the cavity mode response
+    Multiply the spectrum by the cavity mode response in place and return it.
     """
     frequencyMode = params.get("acquisitionType", "single")
     num_cycles_per_step = params.get("numCyclesPerStep", 1)
-    
-    if frequencyMode == "single":
-        # Single cavity mode centered at v_res.
-        gamma = v_res / Q
-        cavity_response = Pmax * ((gamma / 2) ** 2 / ((frequency_grid - v_res) ** 2 + (gamma / 2) ** 2))
-        
-    elif frequencyMode == "range":
+    frequency_min = frequency_max = stepSize = None
+
+    if frequencyMode == "range":
         # In range mode, we require frequencyMin, frequencyMax, and stepSize.
         frequency_min = params.get("frequencyMin")
         frequency_max = params.get("frequencyMax")
         stepSize = params.get("stepSize")
         if frequency_min is None or frequency_max is None or stepSize is None:
             raise ValueError("For frequency range mode, 'frequencyMin', 'frequencyMax', and 'stepSize' must be provided.")
-        
-        # Create a list of cavity mode centers, separated by stepSize.
-        centers = np.arange(frequency_min, frequency_max + stepSize, stepSize)
-        cavity_response = np.zeros_like(frequency_grid)
-        for center in centers:
-            gamma = center / Q 
-            response = Pmax * ((gamma / 2) ** 2 / ((frequency_grid - center) ** 2 + (gamma / 2) ** 2))
-            cavity_response += response
+        # The response does not depend on v_res in range mode.
+        v_res = None
+
+    # Nothing to filter on an empty grid (e.g. frequencyMin > frequencyMax).
+    if frequency_grid.size == 0:
+        return spectrum
+
+    # Look up the noiseless response, bypassing the cache for large grids; a copy is
+    # taken since noise is added per call.
+    if frequency_grid.size <= CACHE_MAX_POINTS:
+        cavity_response_fn = _cavity_response
+    else:
+        cavity_response_fn = _cavity_response.__wrapped__
+    cavity_response = cavity_response_fn(
+        frequencyMode,
+        v_res,
+        frequency_min,
+        frequency_max,
+        stepSize,
+        float(frequency_grid[0]),
+        float(frequency_grid[-1]),
+        frequency_grid.size,
+        Q,
+        Pmax,
+    ).copy()
     
     # Add white noise to the cavity response.
     cavity_response = add_white_noise(cavity_response, num_cycles_per_step, is_cavity_mode=True)
 
-    # Multiply the original spectrum by the cavity response.
-    return spectrum * cavity_response
+    # Multiply the original spectrum by the cavity response in place.
+    spectrum *= cavity_response
+    return spectrum
@@ -1,11 +1,12 @@
 import json
 
-from flask import Flask, request
+import numpy as np
+from flask import Flask, Response, request
 from flask_cors import CORS
 from acquire_spectra import (acquire_spectra, find_peaks)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Points"])
 try:
 	with open("version.txt","r") as f:
 		version = f.read()
@@ -20,9 +21,25 @@ def ftmw() -> str:
     return "<h1 style='color:blue'>Raston Lab FTMW API%s</h1>" % (" - Version "+app.config["VERSION"])
 
 @app.route("/acquire_spectrum", methods=["POST"])
-def acquire_spectrum() -> dict[bool, list[float], list[float]]:
+def acquire_spectrum() -> dict[bool, list[float], list[float]] | Response:
     # put incoming JSON into a dictionary
     params = json.loads(request.data)
+
+    # clients that prefer binary get the raw arrays instead of formatted JSON
+    binary = request.accept_mimetypes.best_match(
+        ["application/json", "application/octet-stream"]
+    ) == "application/octet-stream"
+    if binary:
+        spectrum = acquire_spectra(params, as_arrays=True)
+        if not spectrum["success"]:
+            return spectrum
+        # little-endian float64 frequencies followed by float32 intensities
+        body = spectrum["x"].astype("<f8").tobytes() + spectrum["y"].astype("<f4").tobytes()
+        return Response(
+            body,
+            mimetype="application/octet-stream",
+            headers={"X-Points": str(spectrum["x"].size)},
+        )
     
     # convert dictionary values to strings and return as JSON
     return acquire_spectra(params)